@@ -1,10 +1,30 @@
 import numpy
 import random
 import json
+import copy
+import concurrent.futures
 import subprocess
 import itertools
 import logging
-from typing import Dict, Tuple
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; json with NpEncoder is used instead
+    orjson = None
+
+try:
+    import numba
+    from numba import njit
+except ImportError:  # numba is optional; the kernels then run as Python
+    numba = None
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that leaves the function as it is"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 LOG_LEVEL = logging.ERROR
 logging.basicConfig(format='[%(levelname)s] [%(asctime)s] '
@@ -16,6 +36,9 @@ class NpEncoder(json.JSONEncoder):
     """Encodes Numpy data, to json string
     """
 
+    # Converter for each Numpy type that was encoded before
+    _converters: Dict[type, Callable[[object], object]] = {}
+
     def default(self, obj: object) -> object:
         """Default encoder for encoding obj object
 
@@ -25,17 +48,219 @@ class NpEncoder(json.JSONEncoder):
         Returns:
             [object]: json encodable object
         """
-        if isinstance(obj, numpy.integer):
-            return int(obj)
-        elif isinstance(obj, numpy.floating):
-            return float(obj)
-        elif isinstance(obj, numpy.ndarray):
-            return obj.tolist()
-        else:
-            return super(NpEncoder, self).default(obj)
+        converter = self._converters.get(type(obj))
+        if converter is None:
+            if isinstance(obj, numpy.integer):
+                converter = int
+            elif isinstance(obj, numpy.floating):
+                converter = float
+            elif isinstance(obj, numpy.ndarray):
+                converter = numpy.ndarray.tolist
+            else:
+                return super(NpEncoder, self).default(obj)
+            NpEncoder._converters[type(obj)] = converter
+        return converter(obj)
+
+
+def json_dumps(obj: object) -> bytes:
+    """Encodes obj, which may contain Numpy data, to a json byte string
+
+    If orjson is installed, Numpy arrays are serialized directly from their
+    buffer; otherwise json with the NpEncoder is used.
+
+    Args:
+        obj (object): object to be encoded
+
+    Returns:
+        bytes: json encoded obj
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=NpEncoder().default,
+                            option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, cls=NpEncoder).encode()
+
+
+@njit(cache=True)
+def _score_delta(cells: numpy.ndarray, cell: int, stride: int, item: int,
+                 player_idx: int, stone_a: int, stone_b: int,
+                 max_tile_value: int) -> Tuple[int, int]:
+    """Returns the score change of both players for a move
+
+    Only the 4 neighbours of the move are looked at: a stone scores the
+    tiles next to it, a tile scores for every stone next to it. The border
+    of the padded board is empty, so no bounds checks are needed.
+
+    Args:
+        cells (numpy.ndarray): flat int8 board with an empty border
+        cell (int): index of the move in cells
+        stride (int): length of a row in cells (boardlen + 2)
+        item (int): item that is played (0 for a stone, else tile value)
+        player_idx (int): 0 for the first player, 1 for the second
+        stone_a (int): board code of a stone of the first player
+        stone_b (int): board code of a stone of the second player
+        max_tile_value (int): highest tile value
+
+    Returns:
+        Tuple[int, int]: score change of the first and second player
+    """
+    delta_a = 0
+    delta_b = 0
+    for neighbour in (cell - stride, cell + stride, cell - 1, cell + 1):
+        value = int(cells[neighbour])
+        if item == 0:
+            if -max_tile_value <= value <= max_tile_value:
+                if player_idx == 0:
+                    delta_a += value
+                else:
+                    delta_b += value
+        elif value == stone_a:
+            delta_a += item
+        elif value == stone_b:
+            delta_b += item
+    return delta_a, delta_b
+
+
+@njit(cache=True)
+def _swap_free(free_positions: numpy.ndarray, free_lookup: numpy.ndarray,
+               cell: int, other: int) -> None:
+    """Swaps two cells (flat indices) in the list of free positions
+
+    Args:
+        free_positions (numpy.ndarray): free positions first, then the rest
+        free_lookup (numpy.ndarray): index of each cell in free_positions
+        cell (int): flat index of a board position
+        other (int): flat index of another board position
+    """
+    i = free_lookup[cell]
+    j = free_lookup[other]
+    free_positions[i] = other
+    free_positions[j] = cell
+    free_lookup[cell] = j
+    free_lookup[other] = i
+
+
+@njit(cache=True)
+def _play_kernel(cells: numpy.ndarray, boardlen: int,
+                 inventory: numpy.ndarray, scores: numpy.ndarray,
+                 free_positions: numpy.ndarray, free_lookup: numpy.ndarray,
+                 free_count: int, x: int, y: int, item: int,
+                 player_idx: int, stone_a: int, stone_b: int,
+                 max_tile_value: int) -> int:
+    """Plays a (valid) move on the game state arrays
+
+    Args:
+        cells (numpy.ndarray): flat int8 board with an empty border
+        boardlen (int): board side length
+        inventory (numpy.ndarray): items left per player
+        scores (numpy.ndarray): score per player
+        free_positions (numpy.ndarray): free positions first, then the rest
+        free_lookup (numpy.ndarray): index of each cell in free_positions
+        free_count (int): number of free positions
+        x (int): x position of the move
+        y (int): y position of the move
+        item (int): item that is played (0 for a stone, else tile value)
+        player_idx (int): 0 for the first player, 1 for the second
+        stone_a (int): board code of a stone of the first player
+        stone_b (int): board code of a stone of the second player
+        max_tile_value (int): highest tile value
+
+    Returns:
+        int: new number of free positions
+    """
+    stride = boardlen + 2
+    cell = (x + 1) * stride + y + 1
+
+    inventory[player_idx, item + max_tile_value] -= 1
+    if item != 0:
+        cells[cell] = item
+    elif player_idx == 0:
+        cells[cell] = stone_a
+    else:
+        cells[cell] = stone_b
+
+    free_count -= 1
+    _swap_free(free_positions, free_lookup, x * boardlen + y,
+               free_positions[free_count])
+
+    delta_a, delta_b = _score_delta(cells, cell, stride, item, player_idx,
+                                    stone_a, stone_b, max_tile_value)
+    scores[0] += delta_a
+    scores[1] += delta_b
+    return free_count
+
+
+@njit(cache=True)
+def _undo_kernel(cells: numpy.ndarray, boardlen: int,
+                 inventory: numpy.ndarray, scores: numpy.ndarray,
+                 free_positions: numpy.ndarray, free_lookup: numpy.ndarray,
+                 free_count: int, x: int, y: int, item: int,
+                 player_idx: int, stone_a: int, stone_b: int,
+                 max_tile_value: int) -> int:
+    """Takes back a move on the game state arrays (see _play_kernel)
+
+    Returns:
+        int: new number of free positions
+    """
+    stride = boardlen + 2
+    cell = (x + 1) * stride + y + 1
+
+    delta_a, delta_b = _score_delta(cells, cell, stride, item, player_idx,
+                                    stone_a, stone_b, max_tile_value)
+    scores[0] -= delta_a
+    scores[1] -= delta_b
+
+    cells[cell] = 0
+    inventory[player_idx, item + max_tile_value] += 1
+
+    _swap_free(free_positions, free_lookup, x * boardlen + y,
+               free_positions[free_count])
+    free_count += 1
+
+    return free_count
+
+
+@njit(cache=True)
+def _score_kernel(cells: numpy.ndarray, boardlen: int, stone_a: int,
+                  stone_b: int, max_tile_value: int) -> Tuple[int, int]:
+    """Calculates the score of both players from a flat padded board
+
+    Args:
+        cells (numpy.ndarray): flat int8 board with an empty border
+        boardlen (int): board side length
+        stone_a (int): board code of a stone of the first player
+        stone_b (int): board code of a stone of the second player
+        max_tile_value (int): highest tile value
+
+    Returns:
+        Tuple[int, int]: score of the first and second player
+    """
+    stride = boardlen + 2
+    score_a = 0
+    score_b = 0
+    for x in range(1, boardlen + 1):
+        for y in range(1, boardlen + 1):
+            cell = x * stride + y
+            value = int(cells[cell])
+            if value != stone_a and value != stone_b:
+                continue
+            total = 0
+            for neighbour in (cell - stride, cell + stride,
+                              cell - 1, cell + 1):
+                tile = int(cells[neighbour])
+                if tile >= -max_tile_value:
+                    total += tile
+            if value == stone_a:
+                score_a += total
+            else:
+                score_b += total
+    return score_a, score_b
 
 
 class Player():
+    # Command to start your bot (see play()), and its running process
+    COMMAND = ['some_command_to_run_your_bot']
+    _proc: subprocess.Popen | None = None
+
     def __init__(self):
         # You may initialise class attributes here...
         pass
@@ -43,60 +268,147 @@ class Player():
     def play(self,
              board: numpy.ndarray,
              cur_player: str,
-             players: Dict[str, Dict[str, int | Dict[int, int]]],
-             scores: Dict['Player', int]) -> Tuple[Tuple[int, int], int]:
+             players: Mapping[str, numpy.ndarray],
+             scores: Mapping['Player', int],
+             free_positions: numpy.ndarray,
+             zhash: int) -> Tuple[Tuple[int, int], int]:
         """Play one move in the game
 
         Args:
-            board (numpy.ndarray): Current board positions
+            board (numpy.ndarray): Current board positions (int8). Elements
+                are Game.EMPTY for an empty place, Game.STONE_A/STONE_B for
+                a stone of the first/second player in players, or the tile
+                value for a tile.
             cur_player: Name of the current player (key for players dict)
-            players (dict): Stones and Tiles for all players
-            scores (dict): Current scores for all players
+            players (Mapping): Stones and Tiles for all players (read-only).
+                For each player an int16 array with the number of items left,
+                indexed by item + Game.MAX_TILE_VALUE (so the number of
+                stones is at index Game.MAX_TILE_VALUE).
+            scores (Mapping): Current scores for all players (read-only)
+            free_positions (numpy.ndarray): Empty board positions, as flat
+                indices x * boardlen + y, in no particular order (read-only)
+            zhash (int): Zobrist hash of the game state (see Game.zhash), e.g.
+                to key a transposition table
 
         Returns:
             tuple: ((x: int, y: int) position of the move,
                     item: int 0 for stone, tile value for tile.)
         """
-        # You may add your Python code here or... call subprocess.Popen()
-        # and pass a json string via stdin like this:
-        json_input = json.dumps([board, cur_player, players, scores],
-                                cls=NpEncoder)
-        p = subprocess.Popen(['some_command_to_run_your_bot'],
-                             stdout=subprocess.PIPE, stdin=subprocess.PIPE,
-                             stderr=subprocess.STDOUT)
-        return json.loads(p.communicate(input=json_input.encode())[0])
+        # You may add your Python code here or... run your bot as a
+        # subprocess. It is started once and then reads one json line per
+        # move from stdin and answers with one json line on stdout:
+        json_input = json_dumps([board, cur_player, dict(players),
+                                 {str(p): s for p, s in scores.items()},
+                                 free_positions, zhash])
+        if self._proc is None:
+            self._proc = subprocess.Popen(self.COMMAND,
+                                          stdout=subprocess.PIPE,
+                                          stdin=subprocess.PIPE)
+        try:
+            self._proc.stdin.write(json_input + b'\n')
+            self._proc.stdin.flush()
+            output = self._proc.stdout.readline()
+        except BrokenPipeError:
+            output = b''
+        if not output:
+            try:
+                returncode = self._proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                returncode = None
+            raise RuntimeError(f'Bot {self.COMMAND} stopped without a '
+                               f'move (exit code {returncode}).')
+        return json.loads(output)
+
+    def close(self) -> None:
+        """Stops the bot subprocess, if it was started"""
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:  # the bot stopped before reading all input
+            pass
+        try:
+            self._proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            self._proc.wait()
+        self._proc.stdout.close()
+        self._proc = None
+
+    def __getstate__(self) -> dict:
+        # A running bot process can't be pickled (e.g. to play in another
+        # process, see Game.play_tournament); the copy starts its own.
+        state = self.__dict__.copy()
+        state.pop('_proc', None)
+        return state
+
+    def __enter__(self) -> 'Player':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        self.close()
 
 
 class RandomPlayer(Player):
     def play(self,
              board: numpy.ndarray,
              cur_player: str,
-             players: Dict[str, Dict[str, int | Dict[int, int]]],
-             scores: Dict[Player, int]) -> Tuple[Tuple[int, int], int]:
+             players: Mapping[str, numpy.ndarray],
+             scores: Mapping[Player, int],
+             free_positions: numpy.ndarray,
+             zhash: int) -> Tuple[Tuple[int, int], int]:
 
-        # Check which positions are free and choose one of them at random
-        indices = [(x, y) for (x, y), val in numpy.ndenumerate(board)
-                   if val is None]
-        play_position = random.choice(indices)
+        # Choose one of the free positions at random
+        play_position = divmod(int(random.choice(free_positions)),
+                               len(board))
 
         # Choose a random play, but select another if that move isn't valid
+        items_left = players[cur_player]
+        tiles_left = numpy.flatnonzero(items_left)
+        tiles_left = tiles_left[tiles_left != Game.MAX_TILE_VALUE]
         play = random.choice(['Tiles', 'Stones'])
-        if play == 'Tiles' and not sum(players[cur_player][play].values()):
+        if play == 'Tiles' and not len(tiles_left):
             play = 'Stones'
-        elif play == 'Stones' and players[cur_player][play] == 0:
+        elif play == 'Stones' and items_left[Game.MAX_TILE_VALUE] == 0:
             play = 'Tiles'
 
         # If play == 'Tiles', select one of the remaining tiles
         if play == 'Tiles':
-            tile = random.choice(
-                [k for k in players[cur_player]['Tiles']
-                 if players[cur_player]['Tiles'][k] > 0])
+            tile = int(random.choice(tiles_left)) - Game.MAX_TILE_VALUE
         else:
             tile = 0
 
         return (play_position, tile)
 
 
+class _ScoresView(Mapping):
+    """Read-only mapping of each Player to its score, which follows the
+    score array of a game
+    """
+
+    def __init__(self, players: Tuple[Player, ...], scores: numpy.ndarray):
+        """Initialize the view
+
+        Args:
+            players (Tuple[Player, ...]): players, in the order of scores
+            scores (numpy.ndarray): score per player
+        """
+        self._ids = {player: i for i, player in enumerate(players)}
+        self._scores = scores
+
+    def __getitem__(self, player: Player) -> int:
+        return int(self._scores[self._ids[player]])
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
 class Game:
     """Isis and Osiris game
 
@@ -109,6 +421,13 @@ class Game:
     """
     MAX_TILE_VALUE = 4
     DEFAULT_BOARDLEN = 8
+    EMPTY = 0
+    STONE_A = -100
+    STONE_B = -101
+
+    # Tiles each player starts with (see reset_game), per boardlen and
+    # MAX_TILE_VALUE (which subclasses may change)
+    _TILE_CACHE: Dict[Tuple[int, int], Dict[int, int]] = {}
 
     def __init__(self, boardlen: int = DEFAULT_BOARDLEN,
                  player1: Player | None = None,
@@ -116,10 +435,11 @@ class Game:
         """Initialize a new Isis and Osiris game
 
         The Game class has the following attributes:
-            board (numpy.ndarray[object]): board array. Elements are:
-                None  : empty place on the board
-                Player: stone of Player
-                int   : card with the corresponding value
+            board (numpy.ndarray[int8]): board array. Elements are:
+                EMPTY  : empty place on the board
+                STONE_A: stone of the first player
+                STONE_B: stone of the second player
+                int    : card with the corresponding value
             boardlen (int): length of the board sides
             cur_player (Player): current player
             players Dict[Player, Dict[str, int | Dict[int, int]]]: dict with
@@ -133,6 +453,9 @@ class Game:
             tiles (Dict[int, int]): dict with:
                 int: value of a card (1, -1, 2, -2, ...)
                 int: number of cards of that value
+            zhash (int): Zobrist hash of the board and the player to move,
+                updated on every move. Players that search ahead can use it
+                as key for a transposition table.
 
         Args:
             boardlen (int, optional): board side length.
@@ -144,41 +467,114 @@ class Game:
             ValueError: if the boardlen is not a multiple of 4 or if one of
             the players doesn't have a .play() method.
         """
-        if boardlen % 4 != 0:
-            raise ValueError(f'boardlen must be a multiple of 4, '
-                             f'not {boardlen}.')
-
-        self.board = numpy.full((boardlen, boardlen), None)
         self.boardlen: int = boardlen
         self.cur_player: Player = Player()
-        self.players: Dict[Player, Dict[str, object]] = {}
+        self._player_order: Tuple[Player, ...] = ()
+        self._cur_idx: int = 0
+        self._inventory = numpy.zeros((2, 2 * self.MAX_TILE_VALUE + 1),
+                                      dtype=numpy.int16)
+        # Score per player, indexed like _player_order
+        self._scores = numpy.zeros(2, dtype=numpy.int64)
+        self._public_players: Mapping[str, numpy.ndarray] = {}
+        self._public_scores: Mapping[Player, int] = {}
+        self._public_free = numpy.zeros(0, dtype=numpy.int32)
         self.tiles: Dict[int, int] = {}
+        self._cells = numpy.zeros(0, dtype=numpy.int8)
         self.reset_game()
         if player1 and player2:
             self.add_players(player1, player2)
         logging.debug('Initialized game')
 
     def reset_game(self) -> None:
-        """Resets the game.
+        """Resets the game: empties the board of boardlen by boardlen and
+        sets the tiles to play with. Call add_players() after this to
+        (re)initialize the players.
 
-        Args:
-            player1 (Player): First player.
-            player2 (Player): Second player.
-
-        Notes:
-            player1 and player2 *must* provide the .play() method, with the
-            arguments given by the Player template class.
+        Raises:
+            ValueError: if the boardlen is not a multiple of 4
         """
+        if self.boardlen % 4 != 0:
+            raise ValueError(f'boardlen must be a multiple of 4, '
+                             f'not {self.boardlen}.')
 
-        num_items = self.boardlen ** 2 // 4
-        self.tiles = {}
-        for i, t in enumerate(range(1, self.MAX_TILE_VALUE + 1)):
-            tiles_left = num_items - sum(self.tiles.values())
-            self.tiles[t] = tiles_left // (2 * (self.MAX_TILE_VALUE - i))
-            self.tiles[-t] = self.tiles[t]
+        if self._cells.size == (self.boardlen + 2) ** 2:
+            # Same board size as the last game: reuse the buffers
+            self._cells.fill(self.EMPTY)
+            self._free_positions.sort()
+            self._free_lookup[:] = self._free_positions
+        else:
+            self._allocate_board()
+        self._free_count = self.boardlen ** 2
+        self.zhash = 0
+
+        key = (self.boardlen, self.MAX_TILE_VALUE)
+        if key not in Game._TILE_CACHE:
+            Game._TILE_CACHE[key] = self._compute_tiles(self.boardlen)
+        self.tiles = Game._TILE_CACHE[key].copy()
 
         logging.debug('Reset game.')
 
+    @classmethod
+    def _compute_tiles(cls, boardlen: int) -> Dict[int, int]:
+        """Calculates the tiles each player starts with
+
+        Args:
+            boardlen (int): board side length
+
+        Returns:
+            Dict[int, int]: number of tiles for each tile value
+        """
+        num_items = boardlen ** 2 // 4
+        tiles: Dict[int, int] = {}
+        for i, t in enumerate(range(1, cls.MAX_TILE_VALUE + 1)):
+            tiles_left = num_items - sum(tiles.values())
+            tiles[t] = tiles_left // (2 * (cls.MAX_TILE_VALUE - i))
+            tiles[-t] = tiles[t]
+        return tiles
+
+    def _allocate_board(self) -> None:
+        """Allocates the board and the other arrays that depend on boardlen
+        """
+        # The board is a view on a board with an empty border, so the
+        # neighbours of any board position can be read without bounds checks.
+        # The moves work on the flat, contiguous buffer _cells: the
+        # neighbours of cell i are i - 1, i + 1 and i -/+ (boardlen + 2).
+        self._cells = numpy.zeros((self.boardlen + 2) ** 2, dtype=numpy.int8)
+        self._padded = self._cells.reshape(self.boardlen + 2,
+                                           self.boardlen + 2)
+        self.board = self._padded[1:-1, 1:-1]
+
+        # Empty positions (flat indices) are kept in the first _free_count
+        # elements of _free_positions; _free_lookup is the inverse mapping
+        self._free_positions = numpy.arange(self.boardlen ** 2,
+                                            dtype=numpy.int32)
+        self._free_lookup = numpy.arange(self.boardlen ** 2,
+                                         dtype=numpy.int32)
+
+        # Random keys for each (position, player, item) and for the player
+        # to move. The items a player has left follow from the items played,
+        # so the hash covers the full game state. Fixed seed, so hashes are
+        # reproducible.
+        rng = numpy.random.default_rng(0)
+        self._zobrist_keys = rng.integers(
+            0, 2 ** 63, dtype=numpy.uint64,
+            size=(self.boardlen, self.boardlen, 2,
+                  2 * self.MAX_TILE_VALUE + 1))
+        self._zobrist_side = int(rng.integers(0, 2 ** 63))
+
+    def start_items(self) -> numpy.ndarray:
+        """Returns the items each player starts the game with
+
+        Returns:
+            numpy.ndarray: int16 array with the number of items, indexed by
+            item + MAX_TILE_VALUE (item 0 is a stone, else a tile value)
+        """
+        items = numpy.zeros(2 * self.MAX_TILE_VALUE + 1, dtype=numpy.int16)
+        items[self.MAX_TILE_VALUE] = self.boardlen ** 2 // 4
+        for value, count in self.tiles.items():
+            items[value + self.MAX_TILE_VALUE] = count
+        return items
+
     def add_players(self, player1: Player, player2: Player) -> None:
         """Adds the players to the game. Players must be _instances_ of Player
         player1 is the first player to play (and thus, player 2 is the last)
@@ -191,22 +587,62 @@ class Game:
         Raises:
             ValueError: if the player doesn't have a .play() method
         """
-        if len(self.tiles) == 0:
-            self.reset_game(self.boardlen)
-
         for p in (player1, player2):
             if not hasattr(p, 'play'):
                 raise ValueError(f'Player {p} does not have a "play" '
                                  f'method, which is needed to play.')
 
         self.cur_player = player1
+        self._scores[:] = 0
+        self._player_order = (player1, player2)
+        self._cur_idx = 0
+
+        self._inventory[:] = self.start_items()
+        self._build_public_views()
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            # self.players is built on request, so only when it is logged
+            logging.debug('Added players. Players: %s', self.players)
+
+    def _build_public_views(self) -> None:
+        """Builds the read-only views on the items, scores and free
+        positions that are passed to the players. These follow every move,
+        so they are only built when the players or the arrays change.
+        """
+        public_players = {}
+        for i, player in enumerate(self._player_order):
+            items_left = self._inventory[i].view()
+            items_left.flags.writeable = False
+            public_players[str(player)] = items_left
+        self._public_players = MappingProxyType(public_players)
+        scores = self._scores.view()
+        scores.flags.writeable = False
+        self._public_scores = _ScoresView(self._player_order, scores)
+
+        # The order of _free_positions is part of the game state (see
+        # _free_lookup), so players must not be able to change it
+        self._public_free = self._free_positions.view()
+        self._public_free.flags.writeable = False
+
+    def copy(self) -> 'Game':
+        """Returns an independent copy of the game, e.g. to search ahead
+
+        The game state is held in a few small arrays, so this only copies
+        those; the players and the (read-only) Zobrist keys are shared.
 
-        for player in (player1, player2):
-            self.players[player] = {
-                'Stones': self.boardlen ** 2 // 4,
-                'Tiles': dict(self.tiles)
-            }
-        logging.debug(f'Added players. Players: {self.players}')
+        Returns:
+            Game: copy of the game
+        """
+        game = copy.copy(self)
+        game._cells = self._cells.copy()
+        game._padded = game._cells.reshape(self._padded.shape)
+        game.board = game._padded[1:-1, 1:-1]
+        game._free_positions = self._free_positions.copy()
+        game._free_lookup = self._free_lookup.copy()
+        game._inventory = self._inventory.copy()
+        game._scores = self._scores.copy()
+        game.tiles = dict(self.tiles)
+        game._build_public_views()
+        return game
 
     def play_game(self,
                   boardlen: int = DEFAULT_BOARDLEN,
@@ -221,34 +657,84 @@ class Game:
             player2 (Player, optional): Second player. Defaults to None.
 
         Raises:
-            ValueError: if player1 and player2 are None and no players are
-            known from an earlier call to add_players() or the constructor
+            ValueError: - if player1 and player2 are None and no players are
+                          known from an earlier call to add_players() or the
+                          constructor or
+                        - if boardlen is not a multiple of 4 (the game is
+                          then left as it was)
 
         Returns:
             Dict[Player, int]: score for each Player object
         """
-        if not player1 or not player2 and len(self.players) < 2:
-            raise ValueError('No players were given when play_game was called')
-
-        if player1 and player2:
-            self.add_players(*self.players)
-        else:
-            raise ValueError('Invalid player(s): {player1} or {player2}')
+        if player1 is None or player2 is None:
+            if not self._player_order:
+                raise ValueError('No players were given when play_game was '
+                                 'called')
+            player1 = player1 or self._player_order[0]
+            player2 = player2 or self._player_order[1]
+
+        old_boardlen, self.boardlen = self.boardlen, boardlen
+        try:
+            self.reset_game()
+        except ValueError:
+            self.boardlen = old_boardlen
+            raise
+        self.add_players(player1, player2)
 
         while not self.finished():
             self.play_move(*self.cur_player.play(
                 self.board,
                 str(self.cur_player),
-                {str(p): self.players[p] for p in self.players},
-                self.players_score()))
+                self._public_players,
+                self._public_scores,
+                self._public_free[:self._free_count],
+                self.zhash))
 
-        logging.debug(f'Game finished; board: {self.board}')
+        logging.debug('Game finished; board: %s', self.board)
         scores = self.players_score()
-        logging.debug(f'Game played with scores: {scores}')
+        assert scores == self._board_scores(), 'Incremental score mismatch'
+        logging.debug('Game played with scores: %s', scores)
         return scores
 
+    def play_random_game(self, seed: int | None = None) -> Dict[Player, int]:
+        """Plays the rest of the game with random moves for both players
+
+        The players' .play() methods are not called, which makes this a
+        cheap way to play out a position (e.g. for Monte Carlo search). All
+        random numbers for the game are drawn up front: a random order of
+        the free positions and two rolls per move, one to choose between a
+        stone or a tile and one to choose the tile.
+
+        Args:
+            seed (int, optional): seed for the random generator.
+                                  Defaults to None.
+
+        Returns:
+            Dict[Player, int]: score for each Player object
+        """
+        rng = numpy.random.default_rng(seed)
+        order = rng.permutation(self._free_positions[:self._free_count])
+        rolls = rng.random((len(order), 2))
+
+        for cell, (stone_roll, tile_roll) in zip(order.tolist(),
+                                                 rolls.tolist()):
+            items_left = self._inventory[self._cur_idx]
+            tiles = numpy.flatnonzero(items_left)
+            tiles = tiles[tiles != self.MAX_TILE_VALUE]
+            if items_left[self.MAX_TILE_VALUE] and (stone_roll < 0.5 or
+                                                    not len(tiles)):
+                item = 0
+            else:
+                tile_idx = tiles[int(tile_roll * len(tiles))]
+                item = int(tile_idx) - self.MAX_TILE_VALUE
+
+            self.play_move_unchecked(divmod(cell, self.boardlen), item)
+
+        return self.players_score()
+
     def play_tournament(self, players: list,
-                        boardlen: int = DEFAULT_BOARDLEN) -> Dict[Player, int]:
+                        boardlen: int = DEFAULT_BOARDLEN,
+                        max_workers: int = 1) -> Dict[Player, int]:
         """Play a tournament where each player place twice against all others
 
         Notes:
@@ -260,21 +746,44 @@ class Game:
                 - 2 poinst for a win
             - The play_tournament method iterates multiple times over the
               players object, so providing a players generator will not work.
+            - With max_workers > 1, the games are played in parallel in a
+              pool of processes. The players are pickled to these processes,
+              so they must be picklable, and each game is played by fresh
+              copies of the players: state a player keeps between games is
+              not carried over.
 
         Args:
             players (list): list of players
             boardlen (int, optional): Size of the board (width/length).
                                        Defaults to DEFAULT_boardlen.
+            max_workers (int, optional): Number of processes to play the
+                                         games in. Defaults to 1 (play all
+                                         games in this process).
 
         Returns:
             Dict[Player, int]: score for each Player object
         """
         t_scores = {p: 0 for p in players}
+        # Both games of a pair of players are played back to back
+        matchups = [matchup
+                    for p1, p2 in itertools.combinations(players, 2)
+                    for matchup in ((p1, p2), (p2, p1))]
+
+        if max_workers > 1:
+            # Reseed random in each process, or they'd all play the same
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers, initializer=random.seed) as executor:
+                results = list(executor.map(
+                    _play_one, [p1 for p1, _ in matchups],
+                    [p2 for _, p2 in matchups],
+                    [boardlen] * len(matchups)))
+        else:
+            results = (_play_one(p1, p2, boardlen, self)
+                       for p1, p2 in matchups)
 
-        for (p1, p2) in itertools.permutations(players, 2):
-            logging.info(f'Playing tournament game between {p1} and {p2}')
-            game_scores = self.play_game(boardlen, p1, p2)
-            logging.info(f'Game result: {game_scores}')
+        for (p1, p2), game_scores in zip(matchups, results):
+            game_scores = dict(zip((p1, p2), game_scores))
+            logging.info('Game result: %s', game_scores)
             if game_scores[p1] == game_scores[p2]:
                 t_scores[p1] += 1
                 t_scores[p2] += 1
@@ -282,7 +791,7 @@ class Game:
                 t_scores[p1] += 2
             else:
                 t_scores[p2] += 2
-            logging.info(f'Intermediate tournament scores: {t_scores}')
+            logging.info('Intermediate tournament scores: %s', t_scores)
 
         return t_scores
 
@@ -299,44 +808,210 @@ class Game:
             ValueError: - if the position is already taken or
                         - if a Stone/Tile is played that player doesn't have
         """
-        try:
-            cur_value = self.board[position]
-        except IndexError:
+        item = self._validate(position, item)
+        if item == 0:
+            logging.debug("Player %s played 'Stone' at position %s",
+                          self.cur_player, position)
+        else:
+            logging.debug("Player %s played 'Tile' %d at position %s",
+                          self.cur_player, item, position)
+        self.play_move_unchecked(position, item)
+
+    def play_move_unchecked(self, position: Tuple[int, int],
+                            item: int = 0) -> None:
+        """Plays one move that is known to be valid
+
+        Like play_move, but without checking the move: for players that
+        search ahead on a copy of the game and only generate valid moves
+        (empty positions and items the player has left). An invalid move
+        corrupts the game state.
+
+        Args:
+            position (Tuple[int, int]): Board position that is played
+            item (int, optional): Item that is played. If 0, a stone is played;
+                                  or a tile with the value item. Defaults to 0.
+        """
+        x, y = position
+        self._apply_move(x, y, item)
+
+        # Advance to the next player
+        self._cur_idx ^= 1
+        self.cur_player = self._player_order[self._cur_idx]
+
+    def _validate(self, position: Tuple[int, int], item: int) -> int:
+        """Checks that the current player can play item at position
+
+        Args:
+            position (Tuple[int, int]): Board position that is played
+            item (int): Item that is played (0 for a stone, else tile value)
+
+        Returns:
+            int: item as an int (e.g. 2 for 2.0 from a json bot)
+
+        Raises:
+            IndexError: if position is not a valid board position
+            ValueError: - if the position is already taken or
+                        - if a Stone/Tile is played that player doesn't have
+        """
+        x, y = position
+        if not (0 <= x < self.boardlen and 0 <= y < self.boardlen):
             raise IndexError(f'Position {position} is not a valid position.')
+        cur_value = self.board[x, y]
 
-        if cur_value is not None:
+        if cur_value != self.EMPTY:
             raise ValueError(f'Board at position {position} is already '
                              f'taken with value: {cur_value}.')
 
-        if item == 0 and self.players[self.cur_player]['Stones'] <= 0:
-            raise ValueError("You played a stone, but you don't "
-                             "have stones left.")
+        # Bots may send any json value; only whole numbers are items
+        try:
+            int_item = int(item)
+        except (TypeError, ValueError, OverflowError):
+            int_item = None
+        max_tile = self.MAX_TILE_VALUE
+        if (int_item is None or int_item != item or
+                not -max_tile <= int_item <= max_tile or
+                self._inventory[self._cur_idx, int_item + max_tile] <= 0):
+            raise ValueError(self._invalid_item_message(item))
+        return int_item
+
+    def _invalid_item_message(self, item: int) -> str:
+        """Returns why the current player can't play item
+
+        Args:
+            item (int): Item that is played (0 for a stone, else tile value)
+
+        Returns:
+            str: error message
+        """
+        tiles = self._items_to_dict(self._cur_idx)['Tiles']
+        try:
+            known = item == 0 or item in tiles
+        except (TypeError, ValueError):  # e.g. unhashable lists, arrays
+            known = False
+        if not known:
+            return (f"You played tile {item}, but that is not "
+                    f"a valid tile value. You have: {tiles}")
+        if item == 0:
+            return "You played a stone, but you don't have stones left."
+        return (f"You played tile {item}, but you don't have "
+                f"tiles with that value. You have: {tiles}")
+
+    def _apply_move(self, x: int, y: int, item: int) -> None:
+        """Puts item of the current player on the board at (x, y)
+
+        Updates the board, items, free positions, scores and Zobrist hash,
+        but does not check the move and does not advance the turn.
+
+        Args:
+            x (int): x position of the move
+            y (int): y position of the move
+            item (int): item that is played (0 for a stone, else tile value)
+        """
+        self._free_count = _play_kernel(
+            self._cells, self.boardlen, self._inventory, self._scores,
+            self._free_positions, self._free_lookup, self._free_count,
+            x, y, item, self._cur_idx,
+            self.STONE_A, self.STONE_B, self.MAX_TILE_VALUE)
+        self._update_zhash((x, y), item, self._cur_idx)
+
+    def undo_move(self, position: Tuple[int, int], item: int,
+                  player: Player) -> None:
+        """Takes back a move that was played by play_move
 
-        if item != 0 and item not in self.players[self.cur_player]['Tiles']:
-            raise ValueError(f"You played tile {item}, but that is not "
-                             f"a valid tile value. You have: "
-                             f"{self.players[self.cur_player]['Tiles']}")
+        This is meant for players that search ahead on a copy of the game:
+        the board, the player's items, the scores and the current player
+        are all restored to the state before the move.
 
-        if item != 0 and self.players[self.cur_player]['Tiles'][item] <= 0:
-            raise ValueError(f"You played tile {item}, but you don't have "
-                             f"tiles with that value. You have: "
-                             f"{self.players[self.cur_player]['Tiles']}")
+        Args:
+            position (Tuple[int, int]): Board position that was played
+            item (int): Item that was played (0 for a stone, else tile value)
+            player (Player): Player that played the move
 
+        Raises:
+            IndexError: if position is not a valid board position
+            ValueError: - if the position is empty or
+                        - if the board doesn't hold item of player there
+        """
+        x, y = position
+        if not (0 <= x < self.boardlen and 0 <= y < self.boardlen):
+            raise IndexError(f'Position {position} is not a valid position.')
+        cur_value = int(self.board[x, y])
+        if cur_value == self.EMPTY:
+            raise ValueError(f'Board at position {position} is empty; '
+                             f'there is no move to undo.')
+
+        # The board must hold the move: the player's stone, or the tile (of
+        # which the player must have played at least one)
+        player_idx = self._player_order.index(player)
+        max_tile = self.MAX_TILE_VALUE
         if item == 0:
-            self.board[position] = self.cur_player
-            self.players[self.cur_player]['Stones'] -= 1
-            logging.debug(f"Player {self.cur_player} played 'Stone' "
-                          f"at position {position}")
+            valid = cur_value == (self.STONE_A, self.STONE_B)[player_idx]
         else:
-            self.board[position] = item
-            self.players[self.cur_player]['Tiles'][item] -= 1
-            logging.debug(f"Player {self.cur_player} played 'Tile' {item}"
-                          f"at position {position}")
+            valid = (cur_value == item and
+                     self._inventory[player_idx, cur_value + max_tile] <
+                     self.tiles[cur_value])
+        if not valid:
+            raise ValueError(f'Board at position {position} holds '
+                             f'{cur_value}, which is not item {item} '
+                             f'played by {player}.')
+        item = 0 if item == 0 else cur_value
+
+        self._cur_idx = player_idx
+        self._free_count = _undo_kernel(
+            self._cells, self.boardlen, self._inventory, self._scores,
+            self._free_positions, self._free_lookup, self._free_count,
+            x, y, item, self._cur_idx,
+            self.STONE_A, self.STONE_B, self.MAX_TILE_VALUE)
+        self._update_zhash((x, y), item, self._cur_idx)
+        self.cur_player = player
+
+    def _update_zhash(self, position: Tuple[int, int], item: int,
+                      player_idx: int) -> None:
+        """Toggles a move (and the player to move) in the Zobrist hash
+
+        The same call adds a move to and removes it from the hash.
 
-        # Advance to the next player
-        players = list(self.players.keys())
-        cur_player_idx = players.index(self.cur_player)
-        self.cur_player = players[(cur_player_idx + 1) % len(players)]
+        Args:
+            position (Tuple[int, int]): Board position that is played
+            item (int): Item that is played (0 for a stone, else tile value)
+            player_idx (int): 0 for the first player, 1 for the second
+        """
+        x, y = position
+        key = self._zobrist_keys[x, y, player_idx, item + self.MAX_TILE_VALUE]
+        self.zhash ^= int(key) ^ self._zobrist_side
+
+    @property
+    def players(self) -> Dict[Player, Dict[str, int | Dict[int, int]]]:
+        """Stones and Tiles left for all players
+
+        The items are kept in an int16 array per player; this builds the
+        dict representation from it, so it is meant for reporting only.
+
+        Returns:
+            Dict[Player, Dict[str, int | Dict[int, int]]]: for each Player
+            object a dict with the number of 'Stones' left and a dict of
+            'Tiles' with the number of tiles left for each tile value
+        """
+        return {p: self._items_to_dict(i)
+                for i, p in enumerate(self._player_order)}
+
+    def _items_to_dict(
+            self, player_idx: int) -> Dict[str, int | Dict[int, int]]:
+        """Builds the dict representation of the items a player has left
+
+        Args:
+            player_idx (int): 0 for the first player, 1 for the second
+
+        Returns:
+            Dict[str, int | Dict[int, int]]: the number of 'Stones' left and
+            a dict of 'Tiles' with the number of tiles left for each value
+        """
+        items_left = self._inventory[player_idx].tolist()
+        return {
+            'Stones': items_left[self.MAX_TILE_VALUE],
+            'Tiles': {t: items_left[t + self.MAX_TILE_VALUE]
+                      for t in self.tiles}
+        }
 
     def players_score(self) -> Dict[Player, int]:
         """Returns the score of all players
@@ -344,24 +1019,51 @@ class Game:
         Returns:
             Dict[Player, int]: score for each Player object
         """
-        scores = dict.fromkeys(self.players, 0)
-
-        for (x, y), value in numpy.ndenumerate(self.board):
-            if value in self.players:
-                if (x > 0 and
-                        isinstance(self.board[x - 1, y], int)):
-                    scores[value] += self.board[x - 1, y]
-                if (x < self.boardlen - 1 and
-                        isinstance(self.board[x + 1, y], int)):
-                    scores[value] += self.board[x + 1, y]
-                if (y > 0 and
-                        isinstance(self.board[x, y - 1], int)):
-                    scores[value] += self.board[x, y - 1]
-                if (y < self.boardlen - 1 and
-                        isinstance(self.board[x, y + 1], int)):
-                    scores[value] += self.board[x, y + 1]
+        return dict(zip(self._player_order, self._scores.tolist()))
 
-        return scores
+    def _board_scores(self) -> Dict[Player, int]:
+        """Calculates the score of all players from the board itself
+
+        players_score() keeps the scores up to date on every move; this
+        recalculates them from scratch to verify those. With numba, a
+        compiled scan over the board is used; without it, the numpy
+        version in board_scores().
+
+        Returns:
+            Dict[Player, int]: score for each Player object
+        """
+        if numba is None:
+            scores = self.board_scores(self.board)
+        else:
+            scores = _score_kernel(self._cells, self.boardlen,
+                                   self.STONE_A, self.STONE_B,
+                                   self.MAX_TILE_VALUE)
+        return dict(zip(self._player_order, scores))
+
+    @classmethod
+    def board_scores(cls, board: numpy.ndarray) -> Tuple[int, int]:
+        """Calculates the score of both players from a board
+
+        Args:
+            board (numpy.ndarray): int8 board (see Game.board)
+
+        Returns:
+            Tuple[int, int]: score of the first and the second player
+        """
+        # The tiles on a board with an empty border. Stone codes are the
+        # only values below -MAX_TILE_VALUE, so those are left out.
+        rows, cols = board.shape
+        tiles = numpy.zeros((rows + 2, cols + 2), dtype=numpy.int32)
+        numpy.copyto(tiles[1:-1, 1:-1], board,
+                     where=board >= -cls.MAX_TILE_VALUE)
+
+        # Sum of the tiles next to each board position
+        neighbours = tiles[:-2, 1:-1] + tiles[2:, 1:-1]
+        neighbours += tiles[1:-1, :-2]
+        neighbours += tiles[1:-1, 2:]
+
+        return (int(neighbours[board == cls.STONE_A].sum()),
+                int(neighbours[board == cls.STONE_B].sum()))
 
     def finished(self) -> bool:
         """Returns True if the game is over and False if it isn't
@@ -369,9 +1071,10 @@ class Game:
         Returns:
             bool: True if the game is over and False if it isn't
         """
-        n = numpy.sum(self.board == numpy.array(None))
-        logging.debug(f'{n} / {self.boardlen ** 2} board positions empty')
-        return n == 0
+        finished = self._free_count == 0
+        # Only check the board when the game is over, which is once a game
+        assert not finished or self.board.all(), 'Free position mismatch'
+        return finished
 
     def __str__(self) -> str:
         """Printable version of the board, players state and current score
@@ -381,13 +1084,35 @@ class Game:
         """
         output = 'Board:\n'
         output += str(self.board)
-        for p in self.players:
-            output += f'\nPlayer {p} has: {self.players[p]}'
+        for p, items_left in self.players.items():
+            output += f'\nPlayer {p} has: {items_left}'
         output += f"\nPlayer's scores: {self.players_score()}"
 
         return output
 
 
+def _play_one(player1: Player, player2: Player, boardlen: int,
+              game: Game | None = None) -> Tuple[int, int]:
+    """Plays one game of a tournament (see Game.play_tournament)
+
+    This is a module level function, so it can be run in another process.
+
+    Args:
+        player1 (Player): first player
+        player2 (Player): second player
+        boardlen (int): board side length
+        game (Game, optional): game to play on. Defaults to a new Game.
+
+    Returns:
+        Tuple[int, int]: score of the first and the second player
+    """
+    logging.info('Playing tournament game between %s and %s',
+                 player1, player2)
+    game = game or Game(boardlen)
+    scores = game.play_game(boardlen, player1, player2)
+    return scores[player1], scores[player2]
+
+
 def main():
     g = Game()
     num_players = 4
@@ -0,0 +1,351 @@
+import itertools
+import logging
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy
+
+from IsisAndOsiris import Game
+
+# A class of game states: the items left for the first and for the second
+# player, indexed by item + Game.MAX_TILE_VALUE (see Game.start_items)
+StateClass = Tuple[Tuple[int, ...], Tuple[int, ...]]
+
+# Outcomes, for the first player. Stored in 2 bits per state.
+UNSOLVED = 0
+LOSS = 1
+DRAW = 2
+WIN = 3
+
+
+class OutcomeTable:
+    """Outcomes of all states of one class, packed in 2 bits per state
+
+    The table is indexed by the rank of a state within its class (see
+    Solver.rank). States that were not solved have outcome UNSOLVED.
+    """
+
+    def __init__(self, size: int):
+        """Initialize a table with all states UNSOLVED
+
+        Args:
+            size (int): number of states in the class
+        """
+        self.size = size
+        self.data = numpy.zeros((size + 3) // 4, dtype=numpy.uint8)
+
+    def __getitem__(self, rank: int) -> int:
+        """Returns the outcome of a state
+
+        Args:
+            rank (int): rank of the state
+
+        Returns:
+            int: UNSOLVED, LOSS, DRAW or WIN
+        """
+        return (int(self.data[rank >> 2]) >> ((rank & 3) * 2)) & 3
+
+    def __setitem__(self, rank: int, outcome: int) -> None:
+        """Sets the outcome of a state
+
+        Args:
+            rank (int): rank of the state
+            outcome (int): UNSOLVED, LOSS, DRAW or WIN
+        """
+        shift = (rank & 3) * 2
+        byte = int(self.data[rank >> 2]) & ~(3 << shift)
+        self.data[rank >> 2] = byte | (outcome << shift)
+
+
+class Solver:
+    """Solves Isis and Osiris positions by backward induction
+
+    Game states are partitioned in classes by the items both players have
+    left (see StateClass). All states of a class have the same items on
+    the board, only on different positions, so they are numbered 0 up to
+    the class size by a ranking function: the combinatorial number system
+    applied to the positions of each kind of item in turn. The outcomes of
+    a class are stored in an OutcomeTable, indexed by that rank.
+
+    Classes are solved in order of the number of items on the board, from
+    a full board back to the requested number. Solving a class only needs
+    the tables of the classes with one more item on the board, so only two
+    levels of tables are kept in memory.
+
+    Note:
+        The number of states grows very fast with the board size: a 4x4
+        board already has billions of states per class in the middle of
+        the game. In practice, only very small boards and item sets (or
+        positions close to the end of the game) can be solved.
+    """
+
+    def __init__(self, boardlen: int, items: Sequence[int] | None = None):
+        """Initialize a solver for a board and a set of items
+
+        Args:
+            boardlen (int): board side length
+            items (Sequence[int], optional): items each player starts with,
+                indexed by item + Game.MAX_TILE_VALUE. Defaults to the items
+                of a Game with this boardlen.
+
+        Raises:
+            ValueError: if the items of both players don't fill the board
+        """
+        if items is None:
+            items = Game(boardlen).start_items()
+
+        if 2 * sum(items) != boardlen ** 2:
+            raise ValueError(f'The items of both players ({items}) must '
+                             f'fill the {boardlen}x{boardlen} board.')
+
+        self.boardlen = boardlen
+        self.items: Tuple[int, ...] = tuple(int(n) for n in items)
+        self.tables: Dict[StateClass, OutcomeTable] = {}
+
+    def classes(self, placed: int) -> List[StateClass]:
+        """Returns all classes with a number of items on the board
+
+        The first player moves first, so has placed (placed + 1) // 2 of
+        these items; the second player has placed placed // 2 of them.
+
+        Args:
+            placed (int): number of items on the board
+
+        Returns:
+            List[StateClass]: all classes
+        """
+        return list(itertools.product(self._items_left((placed + 1) // 2),
+                                      self._items_left(placed // 2)))
+
+    def _items_left(self, placed: int) -> List[Tuple[int, ...]]:
+        """Returns all possible items left after a player placed some
+
+        Args:
+            placed (int): number of items the player has placed
+
+        Returns:
+            List[Tuple[int, ...]]: items left, indexed like self.items
+        """
+        left = sum(self.items) - placed
+        return [items for items in itertools.product(
+                    *(range(n + 1) for n in self.items))
+                if sum(items) == left]
+
+    def _symbols(self, state_class: StateClass) -> List[Tuple[int, int]]:
+        """Returns the board values of a class and how often they occur
+
+        Args:
+            state_class (StateClass): class of states
+
+        Returns:
+            List[Tuple[int, int]]: (board value, count) pairs, EMPTY first
+        """
+        left_a, left_b = state_class
+        stone = Game.MAX_TILE_VALUE
+        symbols = [(Game.STONE_A, self.items[stone] - left_a[stone]),
+                   (Game.STONE_B, self.items[stone] - left_b[stone])]
+        for i, n in enumerate(self.items):
+            if i != stone:
+                symbols.append((i - stone, 2 * n - left_a[i] - left_b[i]))
+
+        placed = sum(count for _, count in symbols)
+        return ([(Game.EMPTY, self.boardlen ** 2 - placed)] +
+                [(value, count) for value, count in symbols if count])
+
+    def class_size(self, state_class: StateClass) -> int:
+        """Returns the number of states in a class
+
+        Args:
+            state_class (StateClass): class of states
+
+        Returns:
+            int: number of states
+        """
+        size = 1
+        remaining = self.boardlen ** 2
+        for _, count in self._symbols(state_class):
+            size *= math.comb(remaining, count)
+            remaining -= count
+        return size
+
+    def rank(self, board: numpy.ndarray, state_class: StateClass) -> int:
+        """Returns the rank of a board within its class
+
+        Args:
+            board (numpy.ndarray): int8 board (see Game.board)
+            state_class (StateClass): class of the board
+
+        Returns:
+            int: rank, from 0 up to the class size
+        """
+        cells = board.ravel().tolist()
+        remaining = range(len(cells))
+        rank = 0
+        for value, count in self._symbols(state_class):
+            positions = [i for i, cell in enumerate(remaining)
+                         if cells[cell] == value]
+            rank = (rank * math.comb(len(remaining), count) +
+                    sum(math.comb(p, k + 1) for k, p in enumerate(positions)))
+            remaining = [cell for cell in remaining if cells[cell] != value]
+        return rank
+
+    def unrank(self, rank: int, state_class: StateClass) -> numpy.ndarray:
+        """Returns the board with a rank within its class
+
+        Args:
+            rank (int): rank, from 0 up to the class size
+            state_class (StateClass): class of the board
+
+        Returns:
+            numpy.ndarray: int8 board (see Game.board)
+        """
+        symbols = self._symbols(state_class)
+        sizes = []
+        remaining = self.boardlen ** 2
+        for _, count in symbols:
+            sizes.append(math.comb(remaining, count))
+            remaining -= count
+
+        sub_ranks = []
+        for size in reversed(sizes):
+            rank, sub_rank = divmod(rank, size)
+            sub_ranks.append(sub_rank)
+
+        cells = numpy.empty(self.boardlen ** 2, dtype=numpy.int8)
+        remaining = list(range(self.boardlen ** 2))
+        for (value, count), sub_rank in zip(symbols, reversed(sub_ranks)):
+            positions = _unrank_combination(sub_rank, count)
+            cells[[remaining[p] for p in positions]] = value
+            positions = set(positions)
+            remaining = [cell for i, cell in enumerate(remaining)
+                         if i not in positions]
+        return cells.reshape(self.boardlen, self.boardlen)
+
+    def solve(self, placed: int = 0) -> Dict[StateClass, OutcomeTable]:
+        """Solves all states with a number of items on the board
+
+        Args:
+            placed (int, optional): number of items on the board.
+                                    Defaults to 0 (solve the whole game).
+
+        Raises:
+            ValueError: if placed is not smaller than the number of cells
+
+        Returns:
+            Dict[StateClass, OutcomeTable]: outcome tables of all classes
+        """
+        if not 0 <= placed < self.boardlen ** 2:
+            raise ValueError(f'placed must be from 0 up to '
+                             f'{self.boardlen ** 2}, not {placed}.')
+
+        tables: Dict[StateClass, OutcomeTable] = {}
+        for level in range(self.boardlen ** 2 - 1, placed - 1, -1):
+            tables = {state_class: self._solve_class(state_class, level,
+                                                     tables)
+                      for state_class in self.classes(level)}
+            logging.info('Solved %d classes with %d items on the board',
+                         len(tables), level)
+
+        self.tables = tables
+        return tables
+
+    def _solve_class(self, state_class: StateClass, placed: int,
+                     next_tables: Dict[StateClass, OutcomeTable]
+                     ) -> OutcomeTable:
+        """Solves all states of a class
+
+        Args:
+            state_class (StateClass): class of states
+            placed (int): number of items on the board in the class
+            next_tables (Dict[StateClass, OutcomeTable]): outcome tables of
+                the classes with one more item on the board
+
+        Returns:
+            OutcomeTable: outcomes of the class
+        """
+        mover = placed % 2
+        stone = Game.MAX_TILE_VALUE
+        stone_code = (Game.STONE_A, Game.STONE_B)[mover]
+        left = state_class[mover]
+        moves = []
+        for i, n in enumerate(left):
+            if n:
+                child_left = left[:i] + (n - 1,) + left[i + 1:]
+                child = ((child_left, state_class[1]) if mover == 0 else
+                         (state_class[0], child_left))
+                moves.append((stone_code if i == stone else i - stone, child))
+
+        table = OutcomeTable(self.class_size(state_class))
+        for rank in range(table.size):
+            board = self.unrank(rank, state_class)
+            outcomes = []
+            for x, y in zip(*numpy.nonzero(board == Game.EMPTY)):
+                for value, child in moves:
+                    board[x, y] = value
+                    if placed + 1 == self.boardlen ** 2:
+                        outcomes.append(_final_outcome(board))
+                    else:
+                        outcomes.append(
+                            next_tables[child][self.rank(board, child)])
+                board[x, y] = Game.EMPTY
+            table[rank] = max(outcomes) if mover == 0 else min(outcomes)
+        return table
+
+    def outcome(self, board: numpy.ndarray,
+                items_left: Sequence[Sequence[int]]) -> int:
+        """Returns the outcome of a state from the last solve()
+
+        Args:
+            board (numpy.ndarray): int8 board (see Game.board)
+            items_left (Sequence[Sequence[int]]): items left for the first
+                and the second player, indexed like Game.start_items()
+
+        Raises:
+            ValueError: if the state's class was not solved
+
+        Returns:
+            int: LOSS, DRAW or WIN for the first player
+        """
+        state_class = (tuple(int(n) for n in items_left[0]),
+                       tuple(int(n) for n in items_left[1]))
+        if state_class not in self.tables:
+            raise ValueError(f'States with items left {state_class} '
+                             f'were not solved.')
+        return self.tables[state_class][self.rank(board, state_class)]
+
+
+def _unrank_combination(rank: int, count: int) -> List[int]:
+    """Returns the combination with a rank in the combinatorial number system
+
+    Args:
+        rank (int): rank of the combination
+        count (int): number of elements in the combination
+
+    Returns:
+        List[int]: elements of the combination, highest first
+    """
+    positions = []
+    for k in range(count, 0, -1):
+        p = k - 1
+        while math.comb(p + 1, k) <= rank:
+            p += 1
+        positions.append(p)
+        rank -= math.comb(p, k)
+    return positions
+
+
+def _final_outcome(board: numpy.ndarray) -> int:
+    """Returns the outcome of a full board
+
+    Args:
+        board (numpy.ndarray): int8 board (see Game.board)
+
+    Returns:
+        int: LOSS, DRAW or WIN for the first player
+    """
+    score_a, score_b = Game.board_scores(board)
+    if score_a > score_b:
+        return WIN
+    if score_a < score_b:
+        return LOSS
+    return DRAW
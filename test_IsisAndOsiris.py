@@ -1,3 +1,5 @@
+import json
+import sys
 import numpy
 from pytest import raises
 
@@ -20,6 +22,21 @@ def test_NpEncoder():
     assert isinstance(encoder.default(numpy.float16(12.3)), float)
     assert encoder.default(numpy.ndarray([1, 2, 3]) == [1, 2, 3])
 
+    # Second time through the cached converter
+    assert IAO.NpEncoder._converters[numpy.intc] is int
+    assert encoder.default(numpy.intc(-3)) == -3
+    with raises(TypeError):
+        encoder.default(object())
+    assert object not in IAO.NpEncoder._converters
+
+
+def test_json_dumps():
+    board = numpy.arange(4, dtype=numpy.int8).reshape(2, 2)
+    obj = [board, board[:, 1:], 'player', {'player': numpy.int16(3)}]
+
+    assert json.loads(IAO.json_dumps(obj)) == [[[0, 1], [2, 3]], [[1], [3]],
+                                               'player', {'player': 3}]
+
 
 def test_Game_init():
     class NoPlayer:
@@ -34,8 +51,8 @@ def test_Game_init():
     g.add_players(player1, player2)
 
     assert g.boardlen == boardlen
-    assert all(item == None
-               for item in numpy.nditer(g.board, flags=['refs_ok']))
+    assert g.board.dtype == numpy.int8
+    assert (g.board == g.EMPTY).all()
     assert player1 in g.players
     assert player2 in g.players
 
@@ -43,6 +60,263 @@ def test_Game_init():
         g.add_players(player1, no_player)
 
 
+def test_Game_play_move():
+    player1 = IAO.Player()
+    player2 = IAO.Player()
+    g = IAO.Game(8, player1, player2)
+
+    g.play_move((0, 0))
+    g.play_move((1, 1))
+    g.play_move((0, 1), 3)
+    g.play_move((1, 0), -2)
+
+    assert g.board[0, 0] == g.STONE_A
+    assert g.board[1, 1] == g.STONE_B
+    assert g.players_score() == {player1: 1, player2: 1}
+    assert g._public_scores == g.players_score()
+    assert type(g._public_scores[player2]) is int
+    with raises(ValueError):
+        g._public_scores._scores[0] = 99
+    stones_left = g._public_players[str(player1)][g.MAX_TILE_VALUE]
+    assert stones_left == g.boardlen ** 2 // 4 - 1
+    with raises(ValueError):
+        g._public_players[str(player1)][g.MAX_TILE_VALUE] = 99
+    assert not g.finished()
+
+    with raises(ValueError):
+        g.play_move((0, 0))
+    with raises(ValueError, match='not a valid tile value'):
+        g.play_move((5, 5), 7)
+    for item in (2.5, 'x', None, [2]):
+        with raises(ValueError, match='not a valid tile value'):
+            g.play_move((5, 5), item)
+    with raises(IndexError):
+        g.play_move((-1, 0))
+
+    # Whole numbers in json may come as floats
+    g.play_move((5, 5), 1.0)
+    assert g.board[5, 5] == 1
+
+
+def test_Game_undo_move():
+    player1 = IAO.Player()
+    player2 = IAO.Player()
+    g = IAO.Game(8, player1, player2)
+    moves = [((3, 3), 0, player1), ((5, 5), 0, player2),
+             ((5, 4), 4, player1), ((2, 3), -1, player2)]
+
+    for position, item, _ in moves:
+        g.play_move(position, item)
+    assert (sorted(g._free_positions[:g._free_count]) ==
+            numpy.flatnonzero(g.board == g.EMPTY).tolist())
+    assert g.players_score() == g._board_scores() == {player1: -1,
+                                                      player2: 4}
+
+    g.undo_move(*moves[-1])
+    assert g.players_score() == g._board_scores() == {player1: 0,
+                                                      player2: 4}
+    assert g.cur_player is player2
+    assert g.players[player2]['Tiles'][-1] == g.tiles[-1]
+
+    for move in moves[-2::-1]:
+        g.undo_move(*move)
+    assert (g.board == g.EMPTY).all()
+    assert g._free_count == g.boardlen ** 2
+    assert not g.finished()
+    assert g.players_score() == {player1: 0, player2: 0}
+
+    with raises(ValueError):
+        g.undo_move((0, 0), 0, player1)
+    with raises(IndexError):
+        g.undo_move((-1, 0), 0, player1)
+
+    # The undo must match what is on the board; nothing changes otherwise
+    g.play_move((0, 0), 3)
+    g.play_move((0, 1))
+    state = (g._inventory.copy(), g._scores.copy(), g.zhash)
+    for move in (((0, 0), -2, player1), ((0, 0), 3, player2),
+                 ((0, 0), 0, player1), ((0, 1), 0, player1),
+                 ((0, 1), 1, player2)):
+        with raises(ValueError, match='which is not item'):
+            g.undo_move(*move)
+        assert (g._inventory == state[0]).all()
+        assert (g._scores == state[1]).all() and g.zhash == state[2]
+    g.undo_move((0, 1), 0, player2)
+    g.undo_move((0, 0), 3, player1)
+
+    # A list position, as a bot sends it in json
+    g.play_move([4, 4])
+    g.undo_move([4, 4], 0, player1)
+    assert (g.board == g.EMPTY).all()
+
+
+def test_Game_zhash():
+    player1 = IAO.Player()
+    player2 = IAO.Player()
+    g = IAO.Game(8, player1, player2)
+    h = IAO.Game(8, player1, player2)
+
+    g.play_move((0, 0))
+    g.play_move((1, 1), 2)
+    g.play_move((2, 2), -3)
+    h.play_move((2, 2), -3)
+    g_hash = g.zhash
+    h.play_move((1, 1), 2)
+    h.play_move((0, 0))
+
+    assert g_hash == h.zhash != 0
+    g.play_move((3, 3))
+    assert g.zhash != g_hash
+    g.undo_move((3, 3), 0, player2)
+    assert g.zhash == g_hash
+
+
+def test_Game_tiles():
+    class SmallTilesGame(IAO.Game):
+        MAX_TILE_VALUE = 3
+
+    assert set(IAO.Game(8).tiles) == {1, -1, 2, -2, 3, -3, 4, -4}
+    g = SmallTilesGame(8)
+    assert set(g.tiles) == {1, -1, 2, -2, 3, -3}
+    assert len(g.start_items()) == 7
+    assert set(IAO.Game(8).tiles) == {1, -1, 2, -2, 3, -3, 4, -4}
+
+
+def test_Game_copy():
+    player1 = IAO.Player()
+    player2 = IAO.Player()
+    g = IAO.Game(8, player1, player2)
+    g.play_move((0, 0), 2)
+    h = g.copy()
+
+    h.play_move_unchecked((0, 1))
+    assert h.players_score() == {player1: 0, player2: 2}
+    assert h._public_players[str(player2)][IAO.Game.MAX_TILE_VALUE] == 15
+    assert g.players_score() == {player1: 0, player2: 0}
+    assert g.board[0, 1] == IAO.Game.EMPTY and not g._padded[1, 2]
+    assert g._public_players[str(player2)][IAO.Game.MAX_TILE_VALUE] == 16
+    assert g.cur_player is player2 and g._free_count == 63
+
+    g.play_move((0, 1))
+    assert g.zhash == h.zhash and (g.board == h.board).all()
+
+
+def test_Game_play_random_game():
+    player1 = IAO.Player()
+    player2 = IAO.Player()
+    g = IAO.Game(8, player1, player2)
+    h = IAO.Game(8, player1, player2)
+
+    g.play_move((0, 0), 2)
+    h.play_move((0, 0), 2)
+    scores = g.play_random_game(seed=1)
+
+    assert g.finished()
+    assert scores == g._board_scores()
+    assert (tuple(scores.values()) == IAO.Game.board_scores(g.board) ==
+            getattr(IAO._score_kernel, 'py_func', IAO._score_kernel)(
+                g._cells, 8, g.STONE_A, g.STONE_B, g.MAX_TILE_VALUE))
+    assert not g._inventory.any()
+    assert h.play_random_game(seed=1) == scores
+    assert (h.board == g.board).all()
+
+    # A reset with the same boardlen reuses (and empties) the buffers
+    board = g.board
+    g.reset_game()
+    g.add_players(player1, player2)
+    assert g.board is board and not board.any()
+    assert (g._free_lookup == numpy.arange(64)).all()
+    g.play_move((0, 0), 2)
+    assert g.play_random_game(seed=1) == scores
+    assert (h.board == g.board).all() and h.zhash == g.zhash
+
+
+def test_Player_subprocess():
+    class EchoPlayer(IAO.Player):
+        # Plays a stone on the first free position, and reports its pid
+        # and the hash it got
+        COMMAND = [sys.executable, '-c',
+                   'import json, os, sys\n'
+                   'for line in sys.stdin:\n'
+                   '    free, zhash = json.loads(line)[4:]\n'
+                   '    print(json.dumps([[free[0] // 8, free[0] % 8], 0, '
+                   '                      os.getpid(), zhash]), flush=True)\n']
+
+    with EchoPlayer() as player1:
+        player2 = IAO.Player()
+        g = IAO.Game(8, player1, player2)
+        args = (str(player1), g._public_players, g._public_scores)
+
+        position, item, pid, zhash = player1.play(
+            g.board, *args, g._free_positions[:1], g.zhash)
+        assert (position, item, zhash) == ([0, 0], 0, 0)
+        g.play_move(position, item)
+        position, item, pid2, zhash = player1.play(
+            g.board, *args, numpy.array([9]), g.zhash)
+        assert (position, item, zhash) == ([1, 1], 0, g.zhash)
+        assert pid == pid2
+
+    assert player1._proc is None
+
+    class QuittingPlayer(IAO.Player):
+        COMMAND = [sys.executable, '-c', 'import sys; sys.exit(3)']
+
+    with QuittingPlayer() as player1:
+        with raises(RuntimeError, match='exit code 3'):
+            player1.play(g.board, *args, g._free_positions, g.zhash)
+    assert player1._proc is None
+
+
+def test_Game_play_game():
+    player1 = IAO.RandomPlayer()
+    player2 = IAO.RandomPlayer()
+    g = IAO.Game()
+
+    with raises(ValueError):
+        g.play_game()
+
+    scores = g.play_game(8, player1, player2)
+    assert g.finished()
+    assert scores == g._board_scores()
+
+    scores = g.play_game(12)
+    assert g.board.shape == (12, 12)
+    assert g.finished()
+    assert scores == g._board_scores()
+
+    with raises(ValueError):
+        g.play_game(6)
+    assert g.boardlen == 12
+    with raises(ValueError, match='already taken'):
+        g.play_move((11, 11))
+
+    class ShufflingPlayer(IAO.RandomPlayer):
+        def play(self, board, cur_player, players, scores, free_positions,
+                 zhash):
+            numpy.random.shuffle(free_positions)
+            return super().play(board, cur_player, players, scores,
+                                free_positions, zhash)
+
+    with raises(ValueError, match='read-only'):
+        g.play_game(8, ShufflingPlayer(), player2)
+
+
+def test_Game_play_tournament():
+    players = [IAO.RandomPlayer() for _ in range(3)]
+    scores = IAO.Game().play_tournament(players)
+
+    assert set(scores) == set(players)
+    assert sum(scores.values()) == 2 * 3 * 2
+
+    scores = IAO.Game().play_tournament(players, max_workers=2)
+    assert set(scores) == set(players)
+    assert sum(scores.values()) == 2 * 3 * 2
+
+    for players in ([], players[:1]):
+        assert (IAO.Game().play_tournament(players, max_workers=2) ==
+                {p: 0 for p in players})
+
+
 """
 class Game:
 
@@ -0,0 +1,66 @@
+import numpy
+from pytest import raises
+
+from IsisAndOsiris import Game
+import solver
+
+
+def minimax(board, items_left, mover):
+    if not (board == Game.EMPTY).any():
+        return solver._final_outcome(board)
+
+    outcomes = []
+    for x, y in zip(*numpy.nonzero(board == Game.EMPTY)):
+        for i in numpy.flatnonzero(items_left[mover]):
+            board[x, y] = ((Game.STONE_A, Game.STONE_B)[mover]
+                           if i == Game.MAX_TILE_VALUE
+                           else i - Game.MAX_TILE_VALUE)
+            items_left[mover, i] -= 1
+            outcomes.append(minimax(board, items_left, 1 - mover))
+            items_left[mover, i] += 1
+        board[x, y] = Game.EMPTY
+    return max(outcomes) if mover == 0 else min(outcomes)
+
+
+def test_OutcomeTable():
+    table = solver.OutcomeTable(10)
+    table[5] = solver.WIN
+    table[6] = solver.DRAW
+    table[5] = solver.LOSS
+
+    assert len(table.data) == 3
+    assert [table[r] for r in range(4, 8)] == [solver.UNSOLVED, solver.LOSS,
+                                               solver.DRAW, solver.UNSOLVED]
+
+
+def test_Solver_rank():
+    s = solver.Solver(4)
+    state_class = s.classes(5)[7]
+    size = s.class_size(state_class)
+
+    assert s.class_size(s.classes(0)[0]) == 1
+    for rank in range(0, size, max(1, size // 97)):
+        assert s.rank(s.unrank(rank, state_class), state_class) == rank
+
+    with raises(ValueError):
+        solver.Solver(4, [1] * 9)
+
+
+def test_Solver_solve():
+    # 2x2 board; each player has a stone and a tile -2
+    items = numpy.zeros(2 * Game.MAX_TILE_VALUE + 1, dtype=numpy.int16)
+    items[Game.MAX_TILE_VALUE] = 1
+    items[Game.MAX_TILE_VALUE - 2] = 1
+    s = solver.Solver(2, items)
+
+    tables = s.solve(1)
+    for state_class, table in tables.items():
+        items_left = numpy.array(state_class)
+        for rank in range(table.size):
+            board = s.unrank(rank, state_class)
+            assert table[rank] == minimax(board, items_left, 1)
+            assert s.outcome(board, items_left) == table[rank]
+
+    start = numpy.array([items, items])
+    assert (s.solve()[tuple(map(tuple, start.tolist()))][0] ==
+            minimax(numpy.zeros((2, 2), dtype=numpy.int8), start, 0))